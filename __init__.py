@@ -1,5 +1,6 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import logging
+import time
 
 import voluptuous as vol
 
@@ -7,9 +8,11 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
 
+from .backends import backend_from_config
 from .client import Client
-from .const import KEY_CODE, KEY_SELENIUM_URL, KEY_USER_PREFIX, logger
+from .const import KEY_CODE, KEY_USER_PREFIX, logger
 from .coordinator import TBankUpdateCoordinator
+from .history import async_remove_history
 
 DOMAIN = "tbank"
 
@@ -27,14 +30,16 @@ class RuntimeData:
     client: Client
     user_prefix: str
     coordinator: TBankUpdateCoordinator
+    # Entity ids of the sensors created by the platform, including unavailable ones kept for sold positions
+    known_entities: set[str] = field(default_factory=set)
 
 async def async_setup_entry(hass: HomeAssistant, config: ConfigEntry[RuntimeData]):
     logger.info(config)
-    selenium_url = config.data[KEY_SELENIUM_URL]
     quick_code = config.data[KEY_CODE]
     user_prefix = config.data[KEY_USER_PREFIX]
-    logger.info(f"Selenium url: {selenium_url}, code: {quick_code}, user prefix: {user_prefix}")
-    client = Client(selenium_url, quick_code, user_prefix)
+    backend = backend_from_config(config.data, hass.config.path(DOMAIN))
+    logger.info(f"Session backend: {backend.name}, user prefix: {user_prefix}")
+    client = Client(backend, quick_code)
     coordinator = TBankUpdateCoordinator(hass, config, client, user_prefix)
 
     await coordinator.async_config_entry_first_refresh()
@@ -44,9 +49,17 @@ async def async_setup_entry(hass: HomeAssistant, config: ConfigEntry[RuntimeData
         coordinator=coordinator
     )
 
+    # Platform setup only: the login and fetch of the first refresh are timed separately
+    started = time.perf_counter()
     await hass.config_entries.async_forward_entry_setups(config, [Platform.SENSOR])
+    coordinator.timings["entry_setup"] = time.perf_counter() - started
+    config.async_on_unload(config.add_update_listener(async_reload_entry))
     return True
 
+async def async_reload_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> None:
+    """Reload the entry so that changed options are applied."""
+    await hass.config_entries.async_reload(config_entry.entry_id)
+
 async def async_unload_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> bool:
     """Unload a config entry.
 
@@ -55,4 +68,11 @@ async def async_unload_entry(hass: HomeAssistant, config_entry: ConfigEntry) ->
     """
 
     # Unload platforms and return result
-    return await hass.config_entries.async_unload_platforms(config_entry, [Platform.SENSOR])
+    unloaded = await hass.config_entries.async_unload_platforms(config_entry, [Platform.SENSOR])
+    if unloaded:
+        await config_entry.runtime_data.coordinator.history.async_close()
+    return unloaded
+
+async def async_remove_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> None:
+    """Remove persisted data of a deleted config entry."""
+    await async_remove_history(hass, config_entry.entry_id)
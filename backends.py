@@ -0,0 +1,143 @@
+"""Browser session backends used by the T-Bank client."""
+
+from abc import ABC, abstractmethod
+from collections.abc import Mapping
+import os
+from typing import Any
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from .const import (
+    BACKEND_LOCAL,
+    BACKEND_REMOTE,
+    DEFAULT_BACKEND,
+    KEY_BACKEND,
+    KEY_SELENIUM_URL,
+    KEY_USER_PREFIX,
+)
+
+
+def _chrome_options(user_data_dir: str) -> Options:
+    driver_options = Options()
+    driver_options.add_argument("--disable-gpu")
+    driver_options.add_argument("--window-size=1920,1080")
+    driver_options.add_argument("--no-sandbox")
+    driver_options.add_argument("--disable-dev-shm-usage")
+    driver_options.add_argument(f"--user-data-dir={user_data_dir}")
+    return driver_options
+
+
+class SessionBackend(ABC):
+    """Creates browser sessions for the client."""
+
+    name: str
+
+    @abstractmethod
+    def create_driver(self) -> WebDriver:
+        """Start a new browser session. Blocking."""
+
+    def debugger_address(self, driver: WebDriver) -> str | None:
+        """Return the host:port of the session's DevTools endpoint, if it is reachable for manual login."""
+        return None
+
+
+class RemoteBackend(SessionBackend):
+    """Selenium Grid session. The profile lives on the Grid node."""
+
+    name = BACKEND_REMOTE
+
+    def __init__(self, selenium_url: str, user: str) -> None:
+        self.selenium_url = selenium_url
+        self.driver_options = _chrome_options(f"user-data-{user}")
+
+    def create_driver(self) -> WebDriver:
+        return webdriver.Remote(
+            command_executor=self.selenium_url,
+            options=self.driver_options
+        )
+
+
+class LocalChromiumBackend(SessionBackend):
+    """Headless Chromium running next to Home Assistant.
+
+    The profile is kept in `profile_dir`, so the T-Bank session survives between polls.
+    chromedriver starts every browser on a free DevTools port (localhost only), so several
+    entries can run side by side. The manual login is done by attaching to that port with
+    chrome://inspect, see `debugger_address`.
+    """
+
+    name = BACKEND_LOCAL
+
+    def __init__(self, profile_dir: str) -> None:
+        self.profile_dir = profile_dir
+        driver_options = _chrome_options(profile_dir)
+        driver_options.add_argument("--headless=new")
+        self.driver_options = driver_options
+
+    def create_driver(self) -> WebDriver:
+        os.makedirs(self.profile_dir, exist_ok=True)
+        return webdriver.Chrome(options=self.driver_options)
+
+    def debugger_address(self, driver: WebDriver) -> str | None:
+        return driver.capabilities.get("goog:chromeOptions", {}).get("debuggerAddress")
+
+
+class FakeElement:
+    """Element stub: always present and visible."""
+
+    def is_displayed(self) -> bool:
+        return True
+
+    def send_keys(self, *value: str) -> None:
+        pass
+
+
+class FakeDriver:
+    """In-process stand-in for a logged-in WebDriver session."""
+
+    def __init__(self, session_id: str) -> None:
+        self.session_id = session_id
+        self.title = "T-Bank"
+        self.current_url: str | None = None
+
+    def get(self, url: str) -> None:
+        self.current_url = url
+
+    def implicitly_wait(self, time_to_wait: float) -> None:
+        pass
+
+    def find_element(self, by: str, value: str) -> FakeElement:
+        return FakeElement()
+
+    def get_cookie(self, name: str) -> dict[str, Any] | None:
+        return {"name": name, "value": self.session_id} if name == "psid" else None
+
+    def quit(self) -> None:
+        pass
+
+
+class FakeBackend(SessionBackend):
+    """Browser stand-in for tests: login always succeeds with a fixed psid cookie.
+
+    Only the browser side is faked, `Client` still talks to the T-Bank API over HTTP.
+    Not selectable in the config flow.
+    """
+
+    name = "fake"
+
+    def __init__(self, session_id: str = "fake-session") -> None:
+        self.session_id = session_id
+
+    def create_driver(self) -> WebDriver:
+        return FakeDriver(self.session_id)  # type: ignore[return-value]
+
+
+def backend_from_config(data: Mapping[str, Any], profile_root: str) -> SessionBackend:
+    """Create the backend selected in the config flow."""
+    user_prefix = data[KEY_USER_PREFIX]
+    backend = data.get(KEY_BACKEND, DEFAULT_BACKEND)
+    if backend == BACKEND_LOCAL:
+        return LocalChromiumBackend(os.path.join(profile_root, f"user-data-{user_prefix}"))
+    return RemoteBackend(data.get(KEY_SELENIUM_URL, ""), user_prefix)
@@ -1,37 +1,42 @@
 """Selenium + T-Bank client."""
 
-import json
+from collections import deque
+from datetime import datetime
 import logging
+import time
+from typing import Any
 
 import requests
-from selenium import webdriver
 from selenium.common import TimeoutException
 from selenium.common.exceptions import WebDriverException
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.webdriver import WebDriver
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 
 from homeassistant.exceptions import HomeAssistantError
 
+from .backends import SessionBackend
+
 logger = logging.getLogger("tbank")
 
 class Client():
     """Selenium + T-Bank client."""
 
     BASE_URL = "https://tbank.ru"
+    # Raw API response bodies kept for diagnostics, bounded by their total size in bytes.
+    # The latest response is always kept, even if it alone exceeds the limit.
+    TRAFFIC_BUFFER_BYTES = 4 * 1024 * 1024
 
-    def __init__(self, selenium, code, user: str) -> None:
-        self.selenium_url: str = selenium
+    def __init__(self, backend: SessionBackend, code) -> None:
+        self.backend: SessionBackend = backend
         self.code: str = code
-        driver_options = Options()
-        driver_options.add_argument("--disable-gpu")
-        driver_options.add_argument("--window-size=1920,1080")
-        driver_options.add_argument("--no-sandbox")
-        driver_options.add_argument("--disable-dev-shm-usage")
-        driver_options.add_argument(f"--user-data-dir=user-data-{user}")
-        self.driver_options = driver_options
-        self.driver: webdriver.Remote | None = None
+        self.driver: WebDriver | None = None
+        # Login latencies in seconds, reported in diagnostics.
+        # "login_warm": the stored session was still valid, "login_cold": the quick access code had to be entered.
+        self.timings: dict[str, float] = {}
+        self.traffic: deque[dict[str, Any]] = deque()
+        self.traffic_bytes: int = 0
 
     def testConnection(self):
         try:
@@ -54,6 +59,7 @@ class Client():
             return False
         else:
             logger.info("Selenium connection established")
+            return True
 
     def test_access(self):
         try:
@@ -65,24 +71,28 @@ class Client():
             self.cleanup()
 
     def getDriver(self):
-        if self.driver is None:
-            try:
-                self.driver = webdriver.Remote(
-                    command_executor=self.selenium_url,
-                    options=self.driver_options
-                )
-            except Exception as err:
-                raise SeleniumUnavailable from err
-        else:
+        if self.driver is not None:
             try:
                 self.driver.title
             except WebDriverException:
-                self.driver = self.driver = webdriver.Remote(
-                    command_executor=self.selenium_url,
-                    options=self.driver_options
-                )
+                self.driver = None
+            else:
+                return self.driver
+
+        started = time.perf_counter()
+        try:
+            self.driver = self.backend.create_driver()
+        except Exception as err:
+            raise SeleniumUnavailable from err
+        self.timings["session_start"] = time.perf_counter() - started
         return self.driver
 
+    def debugger_address(self) -> str | None:
+        """DevTools address of the open browser session, for backends that allow manual login through it."""
+        if self.driver is None:
+            return None
+        return self.backend.debugger_address(self.driver)
+
     def cleanup(self):
         if self.driver is None:
             return
@@ -90,7 +100,25 @@ class Client():
         self.driver = None
 
     def debugPrint(self, string):
-        logger.info(string)
+        logger.debug(string)
+
+    def capture(self, endpoint: str, content: bytes):
+        """Keep a raw API response body in the traffic buffer.
+
+        Bodies are stored as the bytes received, so the buffer holds exactly `traffic_bytes`
+        of payload, and are only decoded for the log when DEBUG logging is enabled.
+        Secrets are redacted when the buffer is exported to diagnostics.
+        """
+        self.traffic.append({
+            "time": datetime.now().isoformat(),
+            "endpoint": endpoint,
+            "content": content
+        })
+        self.traffic_bytes += len(content)
+        while self.traffic_bytes > self.TRAFFIC_BUFFER_BYTES and len(self.traffic) > 1:
+            self.traffic_bytes -= len(self.traffic.popleft()["content"])
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("%s: %s", endpoint, content.decode("utf-8", "replace"))
 
     def run(self):
         session_id = self.obtainSessionId()
@@ -105,6 +133,8 @@ class Client():
     def obtainSessionId(self) -> str | None:
         driver = None
         session_id = None
+        login_kind = "login_warm"
+        started = time.perf_counter()
         try:
             driver = self.getDriver()
             driver.implicitly_wait(30)
@@ -116,13 +146,14 @@ class Client():
                 self.waitFor(driver, "//a[@href='/new-product/']")
             except TimeoutException:
                 self.debugPrint("Seems like browser session expired. Trying to input quick login code...")
+                login_kind = "login_cold"
                 self.tryRenewSession(driver)
                 self.waitFor(driver, "//a[@href='/new-product/']")
 
             cookie = driver.get_cookie("psid")
 
             if cookie:
-                self.debugPrint(f"Session id: {cookie["value"]}")
+                self.debugPrint("Session id obtained")
                 session_id = cookie["value"]
             else:
                 self.debugPrint("Session cookie not found. Fuck.")
@@ -130,9 +161,11 @@ class Client():
         finally:
             self.cleanup()
 
+        self.timings[login_kind] = time.perf_counter() - started
+        self.debugPrint(f"Logged in with {self.backend.name} backend in {self.timings[login_kind]:.2f}s ({login_kind})")
         return session_id
 
-    def tryRenewSession(self, driver: webdriver.Remote):
+    def tryRenewSession(self, driver: WebDriver):
         self.debugPrint("Trying to input code...")
         for i, char in enumerate(self.code):
             WebDriverWait(driver, 10)\
@@ -142,20 +175,13 @@ class Client():
     def tryGetAccounts(self, session_id: str | None) -> dict:
         if not session_id:
             raise SessionError
-        self.debugPrint(f"Session id: {session_id}")
 
         accountData = self.getBankAccounts(session_id)
-        self.debugPrint(json.dumps(accountData))
-        self.debugPrint("")
-
         investmentsData = self.getInvestmentAccounts(session_id)
-        self.debugPrint(json.dumps(investmentsData))
-        self.debugPrint("")
 
         totalRub = sum(a["money"]["amount"] for a in filter(lambda a: a["type"] != "Credit" and a["money"]["currency"] == "RUB", accountData)) + sum(a["money"]["amount"] for a in investmentsData)
         totalUsd = sum(a["money"]["amount"] for a in filter(lambda a: a["type"] != "Credit" and a["money"]["currency"] == "USD", accountData))
-        self.debugPrint(f"\n Total: {totalRub} RUB, {totalUsd} USD")
-        self.debugPrint(json.dumps(investmentsData))
+        self.debugPrint(f"Total: {totalRub} RUB, {totalUsd} USD")
         data = {
             "bank": accountData,
             "investments": investmentsData,
@@ -179,6 +205,7 @@ class Client():
         accounts.raise_for_status()
 
         response = accounts.json()
+        self.capture("accounts_light_ib", accounts.content)
         if response["resultCode"] == "INSUFFICIENT_PRIVILEGES":
             raise SessionError
 
@@ -209,7 +236,7 @@ class Client():
         )
         investments.raise_for_status()
         response = investments.json()
-        self.debugPrint(json.dumps(response))
+        self.capture("portfolios/accounts", investments.content)
 
         def investmentMapping(account):
             self.debugPrint(f"Fetching account {account['name']} ({account['brokerAccountId']})")
@@ -272,6 +299,7 @@ class Client():
             }
 
         response = account_request.json()
+        self.capture("purchased-securities", account_request.content)
         real_positions = filter(lambda p: p["securityType"] != "virtual_stock", response["portfolios"][0]["positions"])
         return list(map(positionMapping, real_positions))
 
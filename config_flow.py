@@ -5,16 +5,33 @@ from typing import Any
 import voluptuous as vol
 
 from homeassistant import config_entries
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import config_validation as cv
 
+from .backends import backend_from_config
 from .client import AuthFailed, Client, SeleniumUnavailable
-from .const import DOMAIN, KEY_CODE, KEY_SELENIUM_URL, KEY_USER_PREFIX
+from .const import (
+    BACKEND_LOCAL,
+    BACKEND_OPTIONS,
+    BACKEND_REMOTE,
+    DEFAULT_BACKEND,
+    DEFAULT_GROUP_POSITIONS,
+    DEFAULT_MAX_POSITION_SENSORS,
+    DOMAIN,
+    GROUP_OPTIONS,
+    KEY_BACKEND,
+    KEY_CODE,
+    KEY_GROUP_POSITIONS,
+    KEY_MAX_POSITION_SENSORS,
+    KEY_SELENIUM_URL,
+    KEY_USER_PREFIX,
+)
 
 STEP_USER_DATA_SCHEMA = vol.Schema(
     {
-        vol.Required(KEY_SELENIUM_URL, description={"suggested_value": "http://homeassistant.local:4444"}): str,
+        vol.Optional(KEY_BACKEND, default=DEFAULT_BACKEND): vol.In(BACKEND_OPTIONS),
+        vol.Optional(KEY_SELENIUM_URL, description={"suggested_value": "http://homeassistant.local:4444"}): str,
         vol.Optional(KEY_USER_PREFIX, default="root"): str
     }
 )
@@ -31,13 +48,14 @@ STEP_CODE_DATA_SCHEMA = vol.Schema(
 def step_user_schema(existing_input: MappingProxyType[str, Any] | dict[str, Any] | None) -> vol.Schema:
     return vol.Schema(
         {
-            vol.Required(KEY_SELENIUM_URL, description={"suggested_value": f"{existing_input[KEY_SELENIUM_URL] if existing_input else "http://homeassistant.local:4444"}"}): str,
+            vol.Optional(KEY_BACKEND, default=existing_input.get(KEY_BACKEND, DEFAULT_BACKEND) if existing_input else DEFAULT_BACKEND): vol.In(BACKEND_OPTIONS),
+            vol.Optional(KEY_SELENIUM_URL, description={"suggested_value": f"{existing_input.get(KEY_SELENIUM_URL, "") if existing_input else "http://homeassistant.local:4444"}"}): str,
             vol.Optional(KEY_USER_PREFIX, default=f"{existing_input[KEY_USER_PREFIX] if existing_input else "root"}"): str
         }
     )
 
 def step_code_schema(existing_input: MappingProxyType[str, Any] | dict[str, Any] | None) -> vol.Schema:
-    _LOGGER.info(f"Generating code step schema. Existing input: {existing_input}. Code: {existing_input[KEY_CODE] if existing_input else "1111"}")
+    _LOGGER.info(f"Generating code step schema. Has existing input: {existing_input is not None}")
     return vol.Schema(
         {
             vol.Required(KEY_CODE, description={"suggested_value": f"{existing_input[KEY_CODE] if existing_input else "1111"}"}): vol.All(
@@ -47,6 +65,17 @@ def step_code_schema(existing_input: MappingProxyType[str, Any] | dict[str, Any]
         }
     )
 
+def options_schema(existing_options: MappingProxyType[str, Any] | dict[str, Any]) -> vol.Schema:
+    return vol.Schema(
+        {
+            vol.Optional(KEY_GROUP_POSITIONS, default=existing_options.get(KEY_GROUP_POSITIONS, DEFAULT_GROUP_POSITIONS)): vol.In(GROUP_OPTIONS),
+            vol.Optional(KEY_MAX_POSITION_SENSORS, default=existing_options.get(KEY_MAX_POSITION_SENSORS, DEFAULT_MAX_POSITION_SENSORS)): vol.All(
+                vol.Coerce(int),
+                vol.Range(min=0)
+            )
+        }
+    )
+
 _LOGGER = logging.getLogger(__name__)
 
 async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> Client:
@@ -54,7 +83,7 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> Client:
 
     Data has the keys from STEP_USER_DATA_SCHEMA with values provided by the user.
     """
-    client = Client(data[KEY_SELENIUM_URL], "0000", data[KEY_USER_PREFIX])
+    client = Client(backend_from_config(data, hass.config.path(DOMAIN)), "0000")
     await hass.async_add_executor_job(client.testConnection)
     return client
 
@@ -73,7 +102,9 @@ class TBankConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     async def async_step_user(self, user_input: dict[str, Any] | None):
         errors: dict[str, str] = {}
 
-        if user_input is not None:
+        if user_input is not None and user_input.get(KEY_BACKEND, DEFAULT_BACKEND) == BACKEND_REMOTE and not user_input.get(KEY_SELENIUM_URL):
+            errors[KEY_SELENIUM_URL] = "selenium_url_required"
+        elif user_input is not None:
             try:
                 self._client = await validate_input(self.hass, user_input)
             except SeleniumUnavailable:
@@ -82,7 +113,7 @@ class TBankConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 _LOGGER.exception(f"Unexpected exception: {ex}")
                 errors["base"] = "unknown"
 
-            if "base" not in errors:
+            if not errors:
                 user_prefix = user_input[KEY_USER_PREFIX]
                 self._entry_id = "root" if user_prefix == "" else user_prefix
                 self._input_data = user_input
@@ -98,7 +129,7 @@ class TBankConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         )
 
     async def async_step_authentication(self, user_input: dict[str, Any] | None = None) -> config_entries.ConfigFlowResult:
-        _LOGGER.info(f"Moving to auth step. User data: {user_input}, reconfig data: {self.reconfig_entry.data if self.reconfig_entry else None} ({self.reconfig_entry})")
+        _LOGGER.info(f"Moving to auth step. Code submitted: {user_input is not None}, reconfig entry: {self.reconfig_entry}")
         errors = {}
 
         if (user_input is not None and self._client is not None):
@@ -127,20 +158,44 @@ class TBankConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     data=self._input_data
                 )
 
-        if (self._client is not None and "base" not in errors):
-            await self.hass.async_add_executor_job(self._client.enter_auth_flow)
+        # A failed check closes the browser, so a session is (re)started every time the form is shown
+        if self._client is not None and not await self.hass.async_add_executor_job(self._client.enter_auth_flow):
+            errors["base"] = "selenium_unavailable"
 
+        # Local browsers are reached through their DevTools port, which gets its own instructions
+        local = self._client is not None and self._client.backend.name == BACKEND_LOCAL
         return self.async_show_form(
-            step_id="authentication",
+            step_id="authentication_local" if local else "authentication",
             data_schema=step_code_schema(self.reconfig_entry.data if self.reconfig_entry else user_input),
             errors=errors,
+            description_placeholders={"debugger_address": self._client.debugger_address() or "-"} if local else None,
             last_step=True,  # Adding last_step True/False decides whether form shows Next or Submit buttons
         )
 
+    async def async_step_authentication_local(self, user_input: dict[str, Any] | None = None) -> config_entries.ConfigFlowResult:
+        return await self.async_step_authentication(user_input)
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: config_entries.ConfigEntry) -> config_entries.OptionsFlow:
+        return TBankOptionsFlow()
+
     async def async_step_reconfigure(self, user_input: dict[str, Any] | None = None) -> config_entries.ConfigFlowResult:
         config_entry: config_entries.ConfigEntry = self.hass.config_entries.async_get_entry(
             self.context["entry_id"]
         )
-        _LOGGER.info(f"Reconfiguration started. Existing data: {config_entry.data}")
+        _LOGGER.info(f"Reconfiguration started for {config_entry.title}")
         self.reconfig_entry = config_entry
         return await self.async_step_user(user_input)
+
+class TBankOptionsFlow(config_entries.OptionsFlow):
+    """Per-entry options: position grouping and sensor cap."""
+
+    async def async_step_init(self, user_input: dict[str, Any] | None = None) -> config_entries.ConfigFlowResult:
+        if user_input is not None:
+            return self.async_create_entry(data=user_input)
+
+        return self.async_show_form(
+            step_id="init",
+            data_schema=options_schema(self.config_entry.options)
+        )
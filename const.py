@@ -14,5 +14,27 @@ CONFIG_SCHEMA = vol.Schema({
 KEY_SELENIUM_URL: str = "selenium_url"
 KEY_USER_PREFIX: str = "user_prefix"
 KEY_CODE: str = "code"
+KEY_BACKEND: str = "backend"
+
+BACKEND_REMOTE: str = "remote"
+BACKEND_LOCAL: str = "local"
+BACKEND_OPTIONS: list[str] = [BACKEND_REMOTE, BACKEND_LOCAL]
+DEFAULT_BACKEND: str = BACKEND_REMOTE
 
 logger = logging.getLogger(DOMAIN)
+
+KEY_GROUP_POSITIONS: str = "group_positions"
+KEY_MAX_POSITION_SENSORS: str = "max_position_sensors"
+
+GROUP_NONE: str = "none"
+GROUP_BY_TYPE: str = "type"
+GROUP_OPTIONS: list[str] = [GROUP_NONE, GROUP_BY_TYPE]
+
+DEFAULT_GROUP_POSITIONS: str = GROUP_NONE
+# 0 means every position gets its own sensor
+DEFAULT_MAX_POSITION_SENSORS: int = 0
+
+# Longest time (seconds) a T-Bank callback may hold the event loop before a warning is logged
+LOOP_BLOCK_BUDGET: float = 0.05
+# Coordinator listeners (sensor state writes) notified per event loop iteration
+LISTENER_BATCH_SIZE: int = 200
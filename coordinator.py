@@ -1,19 +1,53 @@
+import asyncio
+from collections.abc import Mapping
+from dataclasses import dataclass
 from datetime import timedelta
+import json
 import logging
+import time
+from types import MappingProxyType
 from typing import Any
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import ConfigEntryAuthFailed
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
 from .client import Client, SessionError
+from .const import (
+    DEFAULT_GROUP_POSITIONS,
+    DEFAULT_MAX_POSITION_SENSORS,
+    GROUP_BY_TYPE,
+    GROUP_NONE,
+    KEY_GROUP_POSITIONS,
+    KEY_MAX_POSITION_SENSORS,
+    LISTENER_BATCH_SIZE,
+)
+from .history import CHANGE_ATTRIBUTES, PositionHistory
+from .watchdog import loop_watchdog
 
 _LOGGER = logging.getLogger(__name__)
+
+@dataclass(frozen=True, slots=True)
+class EntityData:
+    """Ready-to-write state of a single sensor, built in the executor.
+
+    `fingerprint` is a hash of the serialized state and attributes, so the event loop can
+    skip writing entities whose data did not change without comparing the attribute trees.
+    """
+
+    state: float
+    name: str
+    icon: str
+    unit: str | None
+    attributes: Mapping[str, Any]
+    fingerprint: int
+    enabled_default: bool = True
+
 class TBankUpdateCoordinator(DataUpdateCoordinator):
 
-    data: dict[str, Any]
-    entities_lookup: dict[str, dict[str, Any]]
+    data: Mapping[str, EntityData]
+    entities_lookup: Mapping[str, EntityData]
 
     def __init__(self, ha: HomeAssistant, config: ConfigEntry, client: Client, user_prefix: str):
         super().__init__(
@@ -32,16 +66,38 @@ class TBankUpdateCoordinator(DataUpdateCoordinator):
         _LOGGER.info(f"Initializing coordinator with config: {config}")
         self.client: Client = client
         self.user_prefix: str = user_prefix
+        self.group_positions: str = config.options.get(KEY_GROUP_POSITIONS, DEFAULT_GROUP_POSITIONS)
+        self.max_position_sensors: int = int(config.options.get(KEY_MAX_POSITION_SENSORS, DEFAULT_MAX_POSITION_SENSORS))
+        # Durations of the last update cycle in seconds, reported in diagnostics
+        self.timings: dict[str, float] = {}
+        # Empty until the first successful refresh; listeners are also notified about failed ones
+        self.entities_lookup = MappingProxyType({})
+        self.history: PositionHistory = PositionHistory(ha, config.entry_id)
+        # Refreshes are not serialized by DataUpdateCoordinator (a manual update_entity can overlap
+        # the scheduled poll), but lookup building mutates the history and timings from the executor
+        self._lookup_lock = asyncio.Lock()
+        self._fan_out: asyncio.Task | None = None
+
+    async def _async_setup(self) -> None:
+        """Load persisted price history before the first refresh."""
+        await self.history.async_load()
 
     async def _async_update_data(self):
         """Fetch data from API endpoint.
 
         This is the place to pre-process the data to lookup tables
         so entities can quickly look up their data.
+        The lookup is built in the executor, the event loop only swaps in the result.
         """
         try:
-            self.data = await self.hass.async_add_executor_job(self.client.run)
-            self.entities_lookup = _construct_lookup(self.data, self.user_prefix)
+            started = time.perf_counter()
+            data = await self.hass.async_add_executor_job(self.client.run)
+            self.timings["fetch"] = time.perf_counter() - started
+            async with self._lookup_lock:
+                lookup, history_snapshot = await self.hass.async_add_executor_job(self._build_lookup, data, time.time())
+                with loop_watchdog(self.timings, "apply_lookup"):
+                    self.entities_lookup = lookup
+                    self.history.async_schedule_save(history_snapshot)
         except SessionError as err:
             raise ConfigEntryAuthFailed from err
         except Exception as err:
@@ -50,7 +106,83 @@ class TBankUpdateCoordinator(DataUpdateCoordinator):
 
         return self.entities_lookup
 
-def _construct_lookup(data: dict, user_prefix: str) -> dict[str, dict[str, Any]]:
+    def _build_lookup(self, data: dict, now: float) -> tuple[Mapping[str, EntityData], dict[str, Any]]:
+        """Derive the entities lookup and a history snapshot from fresh API data. Runs in the executor."""
+        started = time.perf_counter()
+        self.history.record(data, now)
+        lookup = _freeze_lookup(_construct_lookup(
+            data,
+            self.user_prefix,
+            self.group_positions,
+            self.max_position_sensors
+        ))
+        history_snapshot = self.history.snapshot()
+        self.timings["construct_lookup"] = time.perf_counter() - started
+        return lookup, history_snapshot
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update all registered listeners in batches of `LISTENER_BATCH_SIZE`.
+
+        With every position sensor enabled a single pass of state writes exceeds the loop budget,
+        so the fan-out yields to the event loop between batches. A newer update cancels a fan-out
+        that is still in progress; the first batch runs right away.
+        """
+        if self._fan_out is not None:
+            self._fan_out.cancel()
+        self._fan_out = self.config_entry.async_create_task(self.hass, self._async_fan_out(), "tbank listener fan-out")
+
+    async def _async_fan_out(self) -> None:
+        started = time.perf_counter()
+        batch_timings: dict[str, float] = {}
+        longest_batch = 0.0
+        remove_callbacks = list(self._listeners)
+        for start in range(0, len(remove_callbacks), LISTENER_BATCH_SIZE):
+            if start:
+                await asyncio.sleep(0)
+            with loop_watchdog(batch_timings, "update_listeners_batch"):
+                for remove_callback in remove_callbacks[start:start + LISTENER_BATCH_SIZE]:
+                    # Skip listeners removed while the fan-out was suspended (removed entities, unload)
+                    if (listener := self._listeners.get(remove_callback)) is not None:
+                        listener[0]()
+            longest_batch = max(longest_batch, batch_timings["update_listeners_batch"])
+        self.timings["update_listeners"] = time.perf_counter() - started
+        self.timings["update_listeners_longest_batch"] = longest_batch
+        _LOGGER.debug("Update cycle timings for %s entities: %s", len(self.entities_lookup), self.timings)
+
+def _freeze_lookup(lookup: dict[str, dict[str, Any]]) -> Mapping[str, EntityData]:
+    """Turn the lookup into immutable entity data, so sensors have nothing left to compute.
+
+    Attributes are serialized here only to fingerprint them. Changed attributes are still compared
+    and serialized by Home Assistant on the event loop when the state is written: handing it
+    pre-serialized fragments instead would change what templates see in the attributes.
+    """
+    return MappingProxyType({
+        entity_id: EntityData(
+            state=float(entry['state']),
+            name=entry['attributes']['friendly_name'],
+            icon=f"mdi:currency-{entry['attributes']['currency'].lower()}",
+            unit=entry['attributes']['unit_of_measurement'],
+            attributes=MappingProxyType(entry['attributes']),
+            fingerprint=hash(json.dumps([entry['state'], entry['attributes']], default=str)),
+            enabled_default=entry.get('enabled_default', True)
+        )
+        for entity_id, entry in lookup.items()
+    })
+
+def _construct_lookup(
+    data: dict,
+    user_prefix: str,
+    group_positions: str = GROUP_NONE,
+    max_position_sensors: int = 0
+) -> dict[str, dict[str, Any]]:
+    """Build entity_id -> {state, attributes} lookup.
+
+    Account and group sensors always aggregate every position. Only individual
+    position sensors are affected by `max_position_sensors`: when it is positive,
+    just the top N positions of each account by RUB value get a sensor of their own.
+    Position entries are flagged with `enabled_default: False`.
+    """
     def toSnakeCase(s: str) -> str:
         return ('_').join(s.split())
 
@@ -110,25 +242,58 @@ def _construct_lookup(data: dict, user_prefix: str) -> dict[str, dict[str, Any]]
         account_sensor_name = f"sensor.{prefix(f"money_invest_{snaked}")}".lower()
         position_entities = []
         position: dict
-        for position in investment_account["money"]["positions"]:
+        positions = investment_account["money"]["positions"]
+        by_value = sorted(positions, key=lambda p: p["money"]["RUB"]["total"], reverse=True)
+        tracked = by_value if max_position_sensors <= 0 else by_value[:max_position_sensors]
+        tracked_ids = {id(p) for p in tracked}
+        groups: dict[str, dict[str, Any]] = {}
+        for position in positions:
             totalRub = position["money"]["RUB"]["total"]
             ticker_stripped = ''.join(c for c in position["ticker"] if c.isalnum())
             position["friendly_name"] = f"{position["display"]["name"]} ({account_name})"
             position["unit_of_measurement"] = "₽"
             position["currency"] = "RUB"
             position_entity_id = f"{account_sensor_name}_{ticker_stripped}".lower()
-            position_entities.append(position_entity_id)
+
+            if group_positions == GROUP_BY_TYPE:
+                group = groups.setdefault(position["type"], {"state": 0, "children": [], "count": 0})
+                group["state"] += totalRub
+                group["count"] += 1
+
+            if id(position) not in tracked_ids:
+                continue
+            if group_positions == GROUP_BY_TYPE:
+                groups[position["type"]]["children"].append(position_entity_id)
+            else:
+                position_entities.append(position_entity_id)
             lookup[position_entity_id] = {
                 'state': totalRub,
-                'attributes': position
+                'attributes': position,
+                'enabled_default': False
+            }
+
+        for security_type, group in groups.items():
+            group_entity_id = f"{account_sensor_name}_type_{toSnakeCase(security_type)}".lower()
+            position_entities.append(group_entity_id)
+            lookup[group_entity_id] = {
+                'state': group["state"],
+                'attributes': {
+                    "currency": "RUB",
+                    "unit_of_measurement": "₽",
+                    "friendly_name": f"{security_type} ({account_name})",
+                    "type": security_type,
+                    "positions_count": group["count"],
+                    "children": group["children"]
+                }
             }
 
         attribs = {
             "currency": investment_account["money"]["currency"],
             "unit_of_measurement": "₽" if currency == "RUB" else "$",
             "friendly_name": account_name,
-            "positions": investment_account["money"]["positions"],
-            "children": position_entities
+            "positions": positions,
+            "children": position_entities,
+            **{attr: investment_account[attr] for attr in CHANGE_ATTRIBUTES if attr in investment_account}
         }
         investment_accounts.append(account_sensor_name)
         lookup[account_sensor_name] = {
@@ -0,0 +1,101 @@
+from collections.abc import Mapping
+from dataclasses import fields, is_dataclass
+import json
+import sys
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+
+from . import RuntimeData
+from .const import KEY_CODE
+from .watchdog import loop_watchdog
+
+TO_REDACT = {
+    KEY_CODE,
+    "psid",
+    "sessionid",
+    "sessionId",
+    # Account identifiers in raw API responses
+    "id",
+    "accountId",
+    "brokerAccountId",
+    "accountNumber",
+    "number",
+    "cardNumber",
+    "contractNumber",
+}
+
+
+def _deep_sizeof(obj: Any, seen: set[int] | None = None) -> int:
+    """Approximate memory held by nested mappings/lists/dataclasses, counting shared objects once."""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if is_dataclass(obj):
+        size += sum(_deep_sizeof(getattr(obj, field.name), seen) for field in fields(obj))
+    elif isinstance(obj, Mapping):
+        size += sum(_deep_sizeof(k, seen) + _deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(_deep_sizeof(item, seen) for item in obj)
+    return size
+
+
+def _export_traffic(traffic: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Parse captured response bodies and redact them. Runs in the executor."""
+    exported = []
+    for entry in traffic:
+        try:
+            response = json.loads(entry["content"])
+        except ValueError:
+            response = entry["content"].decode("utf-8", "replace")
+        exported.append({
+            "time": entry["time"],
+            "endpoint": entry["endpoint"],
+            "response": async_redact_data(response, TO_REDACT)
+        })
+    return exported
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry[RuntimeData]
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator = config_entry.runtime_data.coordinator
+    client = config_entry.runtime_data.client
+    lookup = coordinator.entities_lookup
+    # The lookup is immutable, so the heavy walks can run in the executor
+    lookup_bytes = await hass.async_add_executor_job(_deep_sizeof, lookup)
+    traffic = await hass.async_add_executor_job(_export_traffic, list(client.traffic))
+
+    with loop_watchdog(coordinator.timings, "diagnostics"):
+        # Sensors of sold or dropped-out positions stay registered (unavailable) after they leave the lookup
+        created = config_entry.runtime_data.known_entities
+        registered = er.async_entries_for_config_entry(er.async_get(hass), config_entry.entry_id)
+        return {
+            "entry": {
+                "data": async_redact_data(dict(config_entry.data), TO_REDACT),
+                "options": dict(config_entry.options),
+            },
+            "entities": {
+                "created": len(created),
+                "unavailable": len(created - lookup.keys()),
+                "registered": len(registered),
+                "disabled": sum(1 for entity in registered if entity.disabled_by is not None),
+                "lookup_entries": len(lookup),
+                "lookup_bytes_per_entity": lookup_bytes // max(len(lookup), 1),
+            },
+            # Copies: the executor keeps writing to the live dicts
+            "timings": dict(coordinator.timings),
+            "session": {
+                "backend": client.backend.name,
+                "timings": dict(client.timings),
+            },
+            "traffic": traffic,
+        }
@@ -0,0 +1,184 @@
+"""Compact per-position price history for day/week change attributes."""
+
+from array import array
+from datetime import timedelta
+import math
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+HISTORY_STORAGE_VERSION = 1
+HISTORY_SAVE_DELAY = 60
+
+DAY = timedelta(days=1).total_seconds()
+WEEK = timedelta(weeks=1).total_seconds()
+
+# Samples closer than this to the previous one are not stored (restarts, reloads, manual refreshes),
+# a bit below the 3 hour polling interval to tolerate jitter.
+HISTORY_MIN_SPACING = timedelta(hours=2, minutes=30).total_seconds()
+# Enough samples to always span a week plus a day, whatever the refresh pattern
+HISTORY_CAPACITY = math.ceil((WEEK + DAY) / HISTORY_MIN_SPACING) + 1
+
+CHANGE_ATTRIBUTES = ("day_change", "day_change_percent", "week_change", "week_change_percent")
+
+
+class PriceHistory:
+    """Fixed-size ring buffer of (timestamp, price, count) samples, oldest first."""
+
+    __slots__ = ("_counts", "_prices", "_size", "_start", "_timestamps")
+
+    def __init__(self, capacity: int = HISTORY_CAPACITY) -> None:
+        self._timestamps = array("d", [0.0]) * capacity
+        self._prices = array("d", [0.0]) * capacity
+        self._counts = array("d", [0.0]) * capacity
+        self._start = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def last_timestamp(self) -> float | None:
+        return self._timestamps[self._physical(self._size - 1)] if self._size else None
+
+    def _physical(self, i: int) -> int:
+        return (self._start + i) % len(self._timestamps)
+
+    def append(self, timestamp: float, price: float, count: float) -> None:
+        capacity = len(self._timestamps)
+        if self._size < capacity:
+            index = self._physical(self._size)
+            self._size += 1
+        else:
+            index = self._start
+            self._start = (self._start + 1) % capacity
+        self._timestamps[index] = timestamp
+        self._prices[index] = price
+        self._counts[index] = count
+
+    def price_at(self, timestamp: float) -> float | None:
+        """Return the price of the latest sample taken at or before `timestamp`.
+
+        Binary search over the buffer, so the cost is bounded by log2(capacity).
+        """
+        lo, hi = 0, self._size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._timestamps[self._physical(mid)] <= timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == 0:
+            return None
+        return self._prices[self._physical(lo - 1)]
+
+    def as_dict(self) -> dict[str, list[float]]:
+        indices = [self._physical(i) for i in range(self._size)]
+        return {
+            "timestamps": [self._timestamps[i] for i in indices],
+            "prices": [self._prices[i] for i in indices],
+            "counts": [self._counts[i] for i in indices]
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, list[float]]) -> "PriceHistory":
+        history = cls()
+        for sample in zip(data["timestamps"], data["prices"], data["counts"]):
+            history.append(*sample)
+        return history
+
+
+def _change(history: PriceHistory, now: float, period: float, price: float, count: float) -> tuple[float | None, float | None]:
+    base = history.price_at(now - period)
+    if base is None:
+        return None, None
+    return (price - base) * count, (price / base - 1) * 100 if base else None
+
+
+def _store(hass: HomeAssistant, entry_id: str) -> Store[dict[str, Any]]:
+    return Store(hass, HISTORY_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.history")
+
+
+async def async_remove_history(hass: HomeAssistant, entry_id: str) -> None:
+    """Delete the persisted history of a removed config entry."""
+    await _store(hass, entry_id).async_remove()
+
+
+class PositionHistory:
+    """Price histories of every position of a config entry, persisted in .storage."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self._store = _store(hass, entry_id)
+        self.positions: dict[str, PriceHistory] = {}
+        # Last snapshot handed to the delayed save, written at once by `async_close`
+        self._pending: dict[str, Any] | None = None
+        self._closed = False
+
+    async def async_load(self) -> None:
+        stored = await self._store.async_load()
+        if stored:
+            self.positions = {key: PriceHistory.from_dict(data) for key, data in stored.items()}
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return the histories in their stored form."""
+        return {key: history.as_dict() for key, history in self.positions.items()}
+
+    def async_schedule_save(self, snapshot: dict[str, Any]) -> None:
+        """Persist a snapshot taken with `snapshot`. Must run in the event loop."""
+        if self._closed:
+            return
+        self._pending = snapshot
+        self._store.async_delay_save(lambda: snapshot, HISTORY_SAVE_DELAY)
+
+    async def async_close(self) -> None:
+        """Write the pending snapshot now and stop scheduling saves.
+
+        Called on unload, so a delayed save can neither recreate the file of a removed entry
+        nor land after the reloaded entry has loaded it. `Store.async_save` cancels the delayed write.
+        """
+        self._closed = True
+        if self._pending is not None:
+            snapshot, self._pending = self._pending, None
+            await self._store.async_save(snapshot)
+
+    def record(self, data: dict, now: float) -> None:
+        """Add a sample for every position and write change attributes into `data`.
+
+        Positions get `CHANGE_ATTRIBUTES` computed from their price, investment accounts the
+        sums over their positions. Histories of positions that are no longer held are dropped.
+        Changes are computed on every call, but a sample is only stored if the previous one is
+        at least `HISTORY_MIN_SPACING` old, so extra refreshes cannot push the week out of the buffer.
+        """
+        seen: set[str] = set()
+        for investment_account in data["investments"]:
+            account_total = investment_account["money"]["amount"]
+            account_changes: dict[str, float | None] = {"day_change": None, "week_change": None}
+            for position in investment_account["money"]["positions"]:
+                key = f"{investment_account['name']}:{position['ticker']}"
+                seen.add(key)
+                price = position["money"]["RUB"]["price"]
+                count = position["count"]
+                history = self.positions.get(key)
+                if history is None:
+                    history = self.positions[key] = PriceHistory()
+
+                position["day_change"], position["day_change_percent"] = _change(history, now, DAY, price, count)
+                position["week_change"], position["week_change_percent"] = _change(history, now, WEEK, price, count)
+                last_timestamp = history.last_timestamp
+                if last_timestamp is None or now - last_timestamp >= HISTORY_MIN_SPACING:
+                    history.append(now, price, count)
+
+                for attr in account_changes:
+                    if position[attr] is not None:
+                        account_changes[attr] = (account_changes[attr] or 0) + position[attr]
+
+            for attr, change in account_changes.items():
+                investment_account[attr] = change
+                base = account_total - change if change is not None else 0
+                investment_account[f"{attr}_percent"] = change / base * 100 if base else None
+
+        for key in self.positions.keys() - seen:
+            del self.positions[key]
@@ -1,5 +1,3 @@
-from typing import Any
-
 from homeassistant.components.sensor import SensorEntity, SensorStateClass
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
@@ -9,7 +7,8 @@ from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from . import RuntimeData
 from .const import DOMAIN, logger
-from .coordinator import TBankUpdateCoordinator
+from .coordinator import EntityData, TBankUpdateCoordinator
+from .watchdog import loop_watchdog
 
 
 async def async_setup_entry(
@@ -19,15 +18,27 @@ async def async_setup_entry(
 ):
     logger.info(f"async_setup_entry for sensors. Config: {config_entry}")
     coordinator = config_entry.runtime_data.coordinator
+    known_entities = config_entry.runtime_data.known_entities
 
-    async_add_entities(
-        [MoneySensor(coordinator, entity_id, str(config_entry.unique_id)) for entity_id in coordinator.entities_lookup]
-    )
+    @callback
+    def async_add_new_sensors() -> None:
+        """Add sensors for entity ids that are not known yet: new positions or ones that moved into the top N."""
+        with loop_watchdog(coordinator.timings, "sensor_construction"):
+            new_entities = [entity_id for entity_id in coordinator.entities_lookup if entity_id not in known_entities]
+            if not new_entities:
+                return
+            known_entities.update(new_entities)
+            async_add_entities(
+                [MoneySensor(coordinator, entity_id, str(config_entry.unique_id)) for entity_id in new_entities]
+            )
+
+    async_add_new_sensors()
+    config_entry.async_on_unload(coordinator.async_add_listener(async_add_new_sensors))
 
 class MoneySensor(CoordinatorEntity[TBankUpdateCoordinator], SensorEntity):
     """Implementation of a money sensor."""
 
-    data: dict[str, Any]
+    data: EntityData
 
     def __init__(self, coordinator: TBankUpdateCoordinator, entity_id: str, entry_id: str) -> None:
         """Initialise sensor."""
@@ -35,14 +46,28 @@ class MoneySensor(CoordinatorEntity[TBankUpdateCoordinator], SensorEntity):
         self.entity_id = entity_id
         self.data = coordinator.entities_lookup[entity_id]
         self.entry_id = entry_id
+        self._attr_entity_registry_enabled_default = self.data.enabled_default
+        self._last_written: tuple[int, bool] | None = None
 
     @callback
     def _handle_coordinator_update(self) -> None:
         """Update sensor with latest data from coordinator."""
         # This method is called by your DataUpdateCoordinator when a successful update runs.
-        self.data = self.coordinator.entities_lookup[self.entity_id]
+        # Positions that were sold or fell out of the top N keep their last data and go unavailable
+        # until they are back in the lookup.
+        self.data = self.coordinator.entities_lookup.get(self.entity_id, self.data)
+        # Unchanged data (e.g. outside trading hours) is not written again
+        written = (self.data.fingerprint, self.available)
+        if written == self._last_written:
+            return
+        self._last_written = written
         self.async_write_ha_state()
 
+    @property
+    def available(self) -> bool:
+        """Return if the entity is still present in the coordinator data."""
+        return super().available and self.entity_id in self.coordinator.entities_lookup
+
     @property
     def device_class(self) -> str | None:
         """Return device class."""
@@ -71,23 +96,23 @@ class MoneySensor(CoordinatorEntity[TBankUpdateCoordinator], SensorEntity):
     @property
     def name(self) -> str:
         """Return the name of the sensor."""
-        return self.data['attributes']['friendly_name']
+        return self.data.name
 
     @property
     def icon(self) -> str:
-        return f"mdi:currency-{self.data["attributes"]["currency"].lower()}"
+        return self.data.icon
 
     @property
     def native_value(self) -> int | float:
         """Return the state of the entity."""
         # Using native value and native unit of measurement, allows you to change units
         # in Lovelace and HA will automatically calculate the correct value.
-        return float(self.data['state'])
+        return self.data.state
 
     @property
     def native_unit_of_measurement(self) -> str | None:
         """Return unit of temperature."""
-        return self.data['attributes']['unit_of_measurement']
+        return self.data.unit
 
     @property
     def state_class(self) -> str | None:
@@ -106,7 +131,7 @@ class MoneySensor(CoordinatorEntity[TBankUpdateCoordinator], SensorEntity):
     def extra_state_attributes(self):
         """Return the extra state attributes."""
         # Add any additional attributes you want on your sensor.
-        return self.data['attributes']
+        return self.data.attributes
 
     @property
     def suggested_display_precision(self) -> int | None:
@@ -0,0 +1,181 @@
+"""Shared fixtures for T-Bank tests.
+
+The repository root is the `tbank` integration itself, so it is exposed to Home Assistant's
+loader as `custom_components.tbank` through a symlink in a temporary directory.
+"""
+
+import asyncio
+from collections.abc import Callable, Generator
+from contextlib import suppress
+from pathlib import Path
+import sys
+import tempfile
+import time
+from typing import Any
+from unittest.mock import PropertyMock, patch
+
+import pytest
+
+_ROOT = Path(__file__).resolve().parent.parent
+_CUSTOM_COMPONENTS = Path(tempfile.mkdtemp()) / "custom_components"
+_CUSTOM_COMPONENTS.mkdir()
+(_CUSTOM_COMPONENTS / "tbank").symlink_to(_ROOT, target_is_directory=True)
+sys.path.insert(0, str(_CUSTOM_COMPONENTS.parent))
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry  # noqa: E402
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+from homeassistant.setup import async_setup_component  # noqa: E402
+
+from custom_components.tbank.backends import FakeBackend  # noqa: E402
+from custom_components.tbank.const import (  # noqa: E402
+    BACKEND_REMOTE,
+    DOMAIN,
+    KEY_BACKEND,
+    KEY_CODE,
+    KEY_SELENIUM_URL,
+    KEY_USER_PREFIX,
+)
+
+SECURITY_TYPES = ("share", "bond", "etf", "currency")
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Allow loading custom_components.tbank in every test."""
+    return
+
+
+@pytest.fixture
+def entity_registry_enabled_by_default() -> Generator[None]:
+    """Create every entity enabled, including position sensors that are disabled by default."""
+    with patch(
+        "homeassistant.helpers.entity.Entity.entity_registry_enabled_default",
+        new_callable=PropertyMock,
+        return_value=True
+    ):
+        yield
+
+
+def make_portfolio(positions: int, accounts: int = 1, price_shift: float = 0.0) -> dict[str, Any]:
+    """Build data in the shape returned by `Client.run`. `price_shift` is added to every price."""
+    bank = [
+        {"name": "Black", "type": "Current", "money": {"amount": 1000.0, "currency": "RUB"}},
+        {"name": "Platinum", "type": "Credit", "money": {"amount": 500.0, "currency": "RUB"}},
+    ]
+    investments = []
+    for a in range(accounts):
+        items = []
+        for i in range(positions):
+            price = 100.0 + i + price_shift
+            items.append({
+                "ticker": f"T{i}",
+                "type": SECURITY_TYPES[i % len(SECURITY_TYPES)],
+                "count": 10,
+                "money": {
+                    currency: {"total": price * 10, "price": price}
+                    for currency in ("RUB", "USD", "EUR")
+                },
+                "display": {"text_color": "#000000", "logo_color": "#ffffff", "name": f"Security {i}"}
+            })
+        investments.append({
+            "name": f"Брокерский счет {a}",
+            "money": {
+                "amount": sum(p["money"]["RUB"]["total"] for p in items),
+                "currency": "RUB",
+                "positions": items
+            }
+        })
+    return {
+        "bank": bank,
+        "investments": investments,
+        "totalRub": 1000.0 + sum(a["money"]["amount"] for a in investments)
+    }
+
+
+class StubClient:
+    """Stands in for `Client`: no browser, no HTTP, `run` returns generated data.
+
+    `make_data` gets the number of the run, so consecutive runs can return different prices.
+    """
+
+    def __init__(self, make_data: Callable[[int], dict[str, Any]]) -> None:
+        self.make_data = make_data
+        self.runs = 0
+        self.backend = FakeBackend()
+        self.timings: dict[str, float] = {}
+        self.traffic: list[dict[str, Any]] = []
+
+    def run(self) -> dict[str, Any]:
+        data = self.make_data(self.runs)
+        self.runs += 1
+        return data
+
+
+async def setup_entries(
+    hass: HomeAssistant,
+    entries: int,
+    positions: int,
+    options: dict[str, Any] | None = None,
+    make_data: Callable[[int], dict[str, Any]] | None = None
+) -> list[MockConfigEntry]:
+    """Set up `entries` T-Bank config entries, each with `positions` positions.
+
+    Every refresh shifts all prices by 0.01, so it changes every entity.
+    `make_data` replaces the generated data, it gets the number of the run.
+    """
+    if make_data is None:
+        def make_data(run: int) -> dict[str, Any]:
+            return make_portfolio(positions, price_shift=run / 100)
+
+    config_entries = []
+    for i in range(entries):
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            unique_id=f"user{i}",
+            title=f"user{i}",
+            data={
+                KEY_BACKEND: BACKEND_REMOTE,
+                KEY_SELENIUM_URL: "http://selenium.invalid:4444",
+                KEY_USER_PREFIX: f"user{i}",
+                KEY_CODE: "1111"
+            },
+            options=options or {}
+        )
+        entry.add_to_hass(hass)
+        config_entries.append(entry)
+
+    with patch(
+        "custom_components.tbank.Client",
+        side_effect=lambda backend, code: StubClient(make_data)
+    ):
+        assert await async_setup_component(hass, DOMAIN, {})
+        await hass.async_block_till_done()
+    return config_entries
+
+
+class LoopBlockProbe:
+    """Measures the longest stretch the event loop spent without running this probe."""
+
+    def __init__(self) -> None:
+        self.max_block = 0.0
+        self._task: asyncio.Task | None = None
+
+    async def _run(self) -> None:
+        last = time.perf_counter()
+        while True:
+            await asyncio.sleep(0)
+            now = time.perf_counter()
+            self.max_block = max(self.max_block, now - last)
+            last = now
+
+    async def __aenter__(self) -> "LoopBlockProbe":
+        self._task = asyncio.create_task(self._run())
+        await asyncio.sleep(0)
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        assert self._task is not None
+        self._task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._task
@@ -0,0 +1,113 @@
+"""Home Assistant side scaling benchmarks: many entries x many positions.
+
+The network path is stubbed out, so these measure only lookup construction, sensor setup,
+the per-update state write fan-out, event loop blocking and memory per entity.
+Run with `pytest tests/test_benchmark.py`; compare runs with `--benchmark-autosave` / `--benchmark-compare`.
+"""
+
+import asyncio
+from collections.abc import Callable
+import time
+import tracemalloc
+
+import pytest
+
+from homeassistant.components.sensor import DOMAIN as SENSOR_DOMAIN
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.tbank.const import GROUP_NONE
+from custom_components.tbank.coordinator import _construct_lookup, _freeze_lookup
+
+from conftest import LoopBlockProbe, make_portfolio, setup_entries
+
+SCALES = [(1, 10), (1, 2000), (10, 10), (10, 2000)]
+
+
+async def _alternating_fan_out(hass: HomeAssistant, config_entries: list[MockConfigEntry]) -> Callable[[], None]:
+    """Refresh once more and return a callable pushing alternately the old and new lookups.
+
+    Consecutive lookups differ, so every round writes the state of every sensor outside the bank
+    (bank balances do not move); the first round is checked here.
+    """
+    coordinators = [entry.runtime_data.coordinator for entry in config_entries]
+    previous = [coordinator.entities_lookup for coordinator in coordinators]
+    await asyncio.gather(*(coordinator.async_refresh() for coordinator in coordinators))
+    await hass.async_block_till_done()
+    lookups = [previous, [coordinator.entities_lookup for coordinator in coordinators]]
+    rounds = 0
+
+    def fan_out() -> None:
+        # All state writes back to back (the coordinator spreads them over loop iterations):
+        # sensors read `entities_lookup` and write their state
+        nonlocal rounds
+        for coordinator, lookup in zip(coordinators, lookups[rounds % 2]):
+            coordinator.entities_lookup = coordinator.data = lookup
+            DataUpdateCoordinator.async_update_listeners(coordinator)
+        rounds += 1
+
+    before = {state.entity_id: state.last_updated for state in hass.states.async_all(SENSOR_DOMAIN)}
+    fan_out()
+    changed = {state.entity_id for state in hass.states.async_all(SENSOR_DOMAIN) if state.last_updated != before[state.entity_id]}
+    assert changed == {entity_id for entity_id in before if "_money_bank" not in entity_id}
+    return fan_out
+
+
+@pytest.mark.parametrize("positions", [10, 200, 2000])
+def test_construct_lookup(benchmark, positions: int) -> None:
+    """Executor-side cost of turning API data into the entities lookup."""
+    data = make_portfolio(positions)
+
+    lookup = benchmark(lambda: _freeze_lookup(_construct_lookup(data, "bench", GROUP_NONE, 0)))
+
+    assert len(lookup) == positions + 6
+
+
+@pytest.mark.parametrize(("entries", "positions"), SCALES)
+async def test_setup_and_update_cycle(hass: HomeAssistant, benchmark, entries: int, positions: int) -> None:
+    """Setup time and update fan-out with default options (position sensors disabled)."""
+    async with LoopBlockProbe() as probe:
+        started = time.perf_counter()
+        config_entries = await setup_entries(hass, entries, positions)
+        benchmark.extra_info["setup_seconds"] = time.perf_counter() - started
+    benchmark.extra_info["setup_max_loop_block"] = probe.max_block
+    benchmark.extra_info["entities"] = len(hass.states.async_entity_ids(SENSOR_DOMAIN))
+
+    async with LoopBlockProbe() as probe:
+        fan_out = await _alternating_fan_out(hass, config_entries)
+    benchmark.extra_info["refresh_max_loop_block"] = probe.max_block
+
+    benchmark(fan_out)
+
+
+@pytest.mark.parametrize(("entries", "positions"), [(1, 2000), (10, 200)])
+async def test_update_cycle_all_positions_enabled(
+    hass: HomeAssistant,
+    benchmark,
+    entity_registry_enabled_by_default: None,
+    entries: int,
+    positions: int
+) -> None:
+    """Worst case: every position sensor enabled."""
+    config_entries = await setup_entries(hass, entries, positions)
+    benchmark.extra_info["entities"] = len(hass.states.async_entity_ids(SENSOR_DOMAIN))
+
+    benchmark(await _alternating_fan_out(hass, config_entries))
+
+
+@pytest.mark.parametrize(("entries", "positions"), SCALES)
+async def test_memory_per_entity(hass: HomeAssistant, record_property, entries: int, positions: int) -> None:
+    """Memory allocated by setup, per entry in the entities lookups."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        config_entries = await setup_entries(hass, entries, positions)
+        allocated = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+    lookup_entities = sum(len(entry.runtime_data.coordinator.entities_lookup) for entry in config_entries)
+    record_property("bytes_per_entity", allocated // lookup_entities)
+    assert lookup_entities == entries * (positions + 6)
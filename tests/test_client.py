@@ -0,0 +1,108 @@
+"""Client tests: fake browser backend, stubbed T-Bank HTTP API."""
+
+import json
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from custom_components.tbank.backends import FakeBackend
+from custom_components.tbank.client import Client, SessionError
+
+ACCOUNTS = {
+    "resultCode": "OK",
+    "payload": [
+        {"id": "5001", "name": "Black", "accountType": "Current", "moneyAmount": {"value": 1000, "currency": {"name": "RUB"}}},
+        {"id": "5002", "name": "Platinum", "accountType": "Credit", "moneyAmount": {"value": 500, "currency": {"name": "RUB"}}},
+        {"id": "5003", "name": "Dollars", "accountType": "Current", "moneyAmount": {"value": 10, "currency": {"name": "USD"}}},
+    ]
+}
+
+PORTFOLIOS = {
+    "accounts": {
+        "list": [
+            {"name": "Брокерский счет", "brokerAccountId": "2001", "brokerAccountType": "Tinkoff", "totalAmount": {"value": 0, "currency": "RUB"}},
+            {"name": "Копилка", "brokerAccountId": "2002", "brokerAccountType": "InvestBox", "totalAmount": {"value": 300, "currency": "RUB"}},
+        ]
+    }
+}
+
+
+def _position(ticker: str, security_type: str, balance: int, price: float) -> dict[str, Any]:
+    return {
+        "ticker": ticker,
+        "securityType": security_type,
+        "currentBalance": balance,
+        "pricesByCurrency": {"currentPrice": {"RUB": price, "USD": price / 100, "EUR": price / 110}},
+        "positionParams": {"displayParams": {"textColor": "#ffffff", "logoColor": "#00ff00", "showName": ticker}}
+    }
+
+
+SECURITIES = {
+    "portfolios": [{
+        "positions": [
+            _position("SBER", "share", 10, 300),
+            _position("SU26238", "bond", 2, 700),
+            _position("VIRT", "virtual_stock", 1, 100),
+        ]
+    }]
+}
+
+
+def _response(payload: dict[str, Any]) -> MagicMock:
+    response = MagicMock()
+    response.content = json.dumps(payload).encode()
+    response.json.return_value = payload
+    return response
+
+
+def _fake_get(accounts: dict[str, Any] = ACCOUNTS):
+    def get(url: str, params: dict[str, Any], **kwargs: Any) -> MagicMock:
+        if url.endswith("accounts_light_ib"):
+            return _response(accounts)
+        if url.endswith("portfolios/accounts"):
+            return _response(PORTFOLIOS)
+        return _response(SECURITIES)
+    return get
+
+
+def test_run_with_fake_backend() -> None:
+    client = Client(FakeBackend("psid-1"), "1111")
+
+    with patch("custom_components.tbank.client.requests.get", side_effect=_fake_get()) as get:
+        data = client.run()
+
+    assert {call.kwargs["params"].get("sessionid") or call.kwargs["params"].get("sessionId") for call in get.call_args_list} == {"psid-1"}
+    assert [a["name"] for a in data["bank"]] == ["Black", "Platinum", "Dollars"]
+    brokerage, investbox = data["investments"]
+    assert [p["ticker"] for p in brokerage["money"]["positions"]] == ["SBER", "SU26238"]
+    assert brokerage["money"]["amount"] == 10 * 300 + 2 * 700
+    assert investbox["money"]["amount"] == 300
+    # Credit and non-RUB accounts are excluded from the total
+    assert data["totalRub"] == 1000 + 10 * 300 + 2 * 700 + 300
+    assert "login_warm" in client.timings
+    assert client.debugger_address() is None
+
+
+def test_expired_session_raises() -> None:
+    client = Client(FakeBackend(), "1111")
+
+    with (
+        patch("custom_components.tbank.client.requests.get", side_effect=_fake_get({"resultCode": "INSUFFICIENT_PRIVILEGES"})),
+        pytest.raises(SessionError),
+    ):
+        client.run()
+
+
+def test_traffic_buffer_is_bounded_by_bytes() -> None:
+    client = Client(FakeBackend(), "1111")
+    client.TRAFFIC_BUFFER_BYTES = 100
+
+    for i in range(10):
+        client.capture("endpoint", bytes(30))
+    assert client.traffic_bytes == sum(len(entry["content"]) for entry in client.traffic) <= 100
+    assert len(client.traffic) == 3
+
+    # The latest response is kept even if it alone is over the limit
+    client.capture("endpoint", bytes(500))
+    assert [len(entry["content"]) for entry in client.traffic] == [500]
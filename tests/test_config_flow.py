@@ -0,0 +1,33 @@
+"""Config flow: manual authentication steps."""
+
+from unittest.mock import MagicMock, patch
+
+from homeassistant.config_entries import SOURCE_USER
+from homeassistant.core import HomeAssistant
+from homeassistant.data_entry_flow import FlowResultType
+
+from custom_components.tbank.client import AuthFailed
+from custom_components.tbank.const import BACKEND_LOCAL, DOMAIN, KEY_BACKEND, KEY_CODE, KEY_USER_PREFIX
+
+
+async def test_local_auth_retry_restarts_the_browser(hass: HomeAssistant) -> None:
+    client = MagicMock()
+    client.backend.name = BACKEND_LOCAL
+    client.debugger_address.return_value = "localhost:40123"
+    client.test_access.side_effect = AuthFailed
+
+    with patch("custom_components.tbank.config_flow.validate_input", return_value=client):
+        result = await hass.config_entries.flow.async_init(DOMAIN, context={"source": SOURCE_USER})
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], {KEY_BACKEND: BACKEND_LOCAL, KEY_USER_PREFIX: "alex"}
+        )
+        assert result["step_id"] == "authentication_local"
+        assert result["description_placeholders"] == {"debugger_address": "localhost:40123"}
+
+        result = await hass.config_entries.flow.async_configure(result["flow_id"], {KEY_CODE: "1234"})
+
+    # The failed check closed the browser: the local instructions are shown again with a new session
+    assert result["type"] is FlowResultType.FORM
+    assert result["step_id"] == "authentication_local"
+    assert result["errors"] == {"base": "auth_failed"}
+    assert client.enter_auth_flow.call_count == 2
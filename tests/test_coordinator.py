@@ -0,0 +1,83 @@
+"""Lookup construction and event loop budget of the update cycle."""
+
+import asyncio
+
+from homeassistant.components.sensor import DOMAIN as SENSOR_DOMAIN
+from homeassistant.core import HomeAssistant
+
+from custom_components.tbank.const import GROUP_BY_TYPE, GROUP_NONE, LOOP_BLOCK_BUDGET
+from custom_components.tbank.coordinator import _construct_lookup, _freeze_lookup
+
+from conftest import LoopBlockProbe, make_portfolio, setup_entries
+
+ACCOUNT = "sensor.alex_money_invest_brokerage_account_0"
+
+
+def test_positions_are_disabled_by_default() -> None:
+    lookup = _freeze_lookup(_construct_lookup(make_portfolio(3), "alex", GROUP_NONE, 0))
+
+    positions = [f"{ACCOUNT}_t{i}" for i in range(3)]
+    assert lookup[ACCOUNT].attributes["children"] == positions
+    assert [lookup[entity_id].enabled_default for entity_id in positions] == [False] * 3
+    assert lookup[ACCOUNT].enabled_default
+    assert lookup["sensor.alex_money_total"].state == 1000.0 + (100 + 101 + 102) * 10
+
+
+def test_cap_keeps_most_valuable_positions_and_exact_totals() -> None:
+    data = make_portfolio(10)
+    lookup = _freeze_lookup(_construct_lookup(data, "alex", GROUP_NONE, 3))
+
+    assert lookup[ACCOUNT].attributes["children"] == [f"{ACCOUNT}_t{i}" for i in (7, 8, 9)]
+    assert f"{ACCOUNT}_t0" not in lookup
+    assert lookup[ACCOUNT].state == sum((100 + i) * 10 for i in range(10))
+    assert len(lookup[ACCOUNT].attributes["positions"]) == 10
+
+
+def test_grouping_by_type() -> None:
+    lookup = _freeze_lookup(_construct_lookup(make_portfolio(8), "alex", GROUP_BY_TYPE, 2))
+
+    bonds = lookup[f"{ACCOUNT}_type_bond"]
+    # Positions 1 and 5 are bonds; only the two most valuable positions of the account get sensors
+    assert bonds.state == (101 + 105) * 10
+    assert bonds.attributes["positions_count"] == 2
+    assert bonds.attributes["children"] == []
+    assert lookup[f"{ACCOUNT}_type_etf"].attributes["children"] == [f"{ACCOUNT}_t6"]
+    assert sum(lookup[f"{ACCOUNT}_type_{t}"].state for t in ("share", "bond", "etf", "currency")) == lookup[ACCOUNT].state
+
+
+def test_fingerprint_follows_data() -> None:
+    first = _freeze_lookup(_construct_lookup(make_portfolio(2), "alex", GROUP_NONE, 0))
+    same = _freeze_lookup(_construct_lookup(make_portfolio(2), "alex", GROUP_NONE, 0))
+    moved = _freeze_lookup(_construct_lookup(make_portfolio(2, price_shift=1), "alex", GROUP_NONE, 0))
+
+    assert first[ACCOUNT].fingerprint == same[ACCOUNT].fingerprint
+    assert first[ACCOUNT].fingerprint != moved[ACCOUNT].fingerprint
+    assert first["sensor.alex_money_bank"].fingerprint == moved["sensor.alex_money_bank"].fingerprint
+
+
+async def test_refresh_stays_within_loop_budget(hass: HomeAssistant, entity_registry_enabled_by_default: None) -> None:
+    """Every position sensor enabled, so each refresh writes all 2006 states."""
+    (entry,) = await setup_entries(hass, 1, 2000)
+    coordinator = entry.runtime_data.coordinator
+    assert len(hass.states.async_entity_ids(SENSOR_DOMAIN)) == 2006
+
+    async with LoopBlockProbe() as probe:
+        await coordinator.async_refresh()
+        await hass.async_block_till_done()
+
+    assert coordinator.last_update_success
+    position = "sensor.user0_money_invest_brokerage_account_0_t1999"
+    assert float(hass.states.get(position).state) == coordinator.entities_lookup[position].state
+    assert coordinator.timings["update_listeners_longest_batch"] < LOOP_BLOCK_BUDGET
+    assert probe.max_block < LOOP_BLOCK_BUDGET
+
+
+async def test_overlapping_refreshes_build_lookups_one_at_a_time(hass: HomeAssistant) -> None:
+    (entry,) = await setup_entries(hass, 1, 200)
+    coordinator = entry.runtime_data.coordinator
+
+    # A manual update_entity overlapping the scheduled poll
+    await asyncio.gather(coordinator.async_refresh(), coordinator.async_refresh())
+
+    assert coordinator.last_update_success
+    assert len(coordinator.history.positions) == 200
@@ -0,0 +1,23 @@
+"""Diagnostics of a config entry."""
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.tbank.diagnostics import async_get_config_entry_diagnostics
+
+from conftest import make_portfolio, setup_entries
+
+
+async def test_entities_include_unavailable_sensors(hass: HomeAssistant) -> None:
+    # One of the three positions is sold after the first run
+    (entry,) = await setup_entries(hass, 1, 3, make_data=lambda run: make_portfolio(3 if run == 0 else 2))
+    await entry.runtime_data.coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+
+    assert diagnostics["entities"]["created"] == 3 + 6
+    assert diagnostics["entities"]["unavailable"] == 1
+    assert diagnostics["entities"]["registered"] == 3 + 6
+    assert diagnostics["entities"]["disabled"] == 3
+    assert diagnostics["entities"]["lookup_entries"] == 2 + 6
+    assert diagnostics["entry"]["data"]["code"] == "**REDACTED**"
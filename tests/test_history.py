@@ -0,0 +1,96 @@
+"""Price history ring buffer and change attributes."""
+
+from datetime import timedelta
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.tbank.const import DOMAIN
+from custom_components.tbank.history import (
+    DAY,
+    HISTORY_CAPACITY,
+    HISTORY_MIN_SPACING,
+    HISTORY_SAVE_DELAY,
+    WEEK,
+    PositionHistory,
+    PriceHistory,
+)
+
+from conftest import make_portfolio, setup_entries
+
+HOUR = 3600.0
+
+
+def test_ring_buffer_keeps_latest_samples() -> None:
+    history = PriceHistory(4)
+    for i in range(6):
+        history.append(i * 10.0, 100.0 + i, 1)
+
+    assert len(history) == 4
+    assert history.as_dict()["timestamps"] == [20.0, 30.0, 40.0, 50.0]
+    assert history.last_timestamp == 50.0
+    assert history.price_at(5.0) is None
+    assert history.price_at(25.0) == 102.0
+    assert history.price_at(100.0) == 105.0
+    assert PriceHistory.from_dict(history.as_dict()).as_dict() == history.as_dict()
+
+
+def test_capacity_spans_a_week() -> None:
+    assert (HISTORY_CAPACITY - 1) * HISTORY_MIN_SPACING >= WEEK + DAY
+
+
+async def test_day_and_week_change(hass: HomeAssistant) -> None:
+    history = PositionHistory(hass, "entry")
+    start = 1_700_000_000.0
+
+    for step in range(8 * 8 + 1):
+        data = make_portfolio(1)
+        data["investments"][0]["money"]["positions"][0]["money"]["RUB"]["price"] = 100.0 + step
+        history.record(data, start + step * 3 * HOUR)
+
+    position = data["investments"][0]["money"]["positions"][0]
+    # 8 polls a day, 10 pieces of 1 RUB price growth each
+    assert position["day_change"] == 8 * 10
+    assert position["week_change"] == 56 * 10
+    assert position["day_change_percent"] == (164 / 156 - 1) * 100
+    assert data["investments"][0]["day_change"] == 80
+
+
+async def test_frequent_refreshes_do_not_evict_the_week(hass: HomeAssistant) -> None:
+    history = PositionHistory(hass, "entry")
+    start = 1_700_000_000.0
+    now = start
+
+    # Regular 3 hour polls with a burst of refreshes (restarts, reloads) in between
+    while now - start <= WEEK + 6 * HOUR:
+        for burst in range(4):
+            history.record(make_portfolio(1), now + burst * 60)
+        now += 3 * HOUR
+
+    data = make_portfolio(1)
+    history.record(data, now)
+    assert data["investments"][0]["money"]["positions"][0]["week_change"] is not None
+
+
+async def test_unload_writes_pending_history(hass: HomeAssistant, hass_storage: dict[str, Any]) -> None:
+    (entry,) = await setup_entries(hass, 1, 2)
+    key = f"{DOMAIN}.{entry.entry_id}.history"
+    assert key not in hass_storage
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert len(hass_storage[key]["data"]) == 2
+
+
+async def test_removed_entry_history_is_not_written_back(hass: HomeAssistant, hass_storage: dict[str, Any]) -> None:
+    (entry,) = await setup_entries(hass, 1, 2)
+
+    await hass.config_entries.async_remove(entry.entry_id)
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=2 * HISTORY_SAVE_DELAY))
+    await hass.async_block_till_done()
+
+    assert f"{DOMAIN}.{entry.entry_id}.history" not in hass_storage
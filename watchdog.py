@@ -0,0 +1,24 @@
+"""Event loop watchdog for T-Bank callbacks."""
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+import time
+
+from .const import LOOP_BLOCK_BUDGET, logger
+
+
+@contextmanager
+def loop_watchdog(timings: dict[str, float], name: str, budget: float = LOOP_BLOCK_BUDGET) -> Iterator[None]:
+    """Time a synchronous section running on the event loop.
+
+    The duration is stored in `timings[name]`; a warning is logged if it exceeds `budget`.
+    Must not wrap an `await`, otherwise the time spent suspended is counted too.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        timings[name] = elapsed
+        if elapsed > budget:
+            logger.warning(f"{name} held the event loop for {elapsed * 1000:.1f} ms (budget: {budget * 1000:.0f} ms)")